@@ -1,7 +1,7 @@
 
 import os
 import sqlite3
-from contextlib import closing
+import threading
 from datetime import datetime, timedelta
 
 import pandas as pd
@@ -11,30 +11,177 @@ ROOT = os.path.dirname(__file__)
 DB_PATH = os.path.join(ROOT, "foodwaste.db")
 SCHEMA_PATH = os.path.join(ROOT, "schema.sql")
 QUERIES_PATH = os.path.join(ROOT, "queries.sql")
+PAGE_SIZE = 100
+
+# CRUD statements: fixed strings so sqlite3's per-connection statement cache is hit on every submit
+INSERT_LISTING_SQL = "INSERT INTO food_listings (Food_ID, Food_Name, Quantity, Expiry_Date, Provider_ID, Provider_Type, Location, Food_Type, Meal_Type) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);"
+UPDATE_LISTING_SQL = "UPDATE food_listings SET Quantity=?, Expiry_Date=? WHERE Food_ID=?;"
+DELETE_LISTING_SQL = "DELETE FROM food_listings WHERE Food_ID=?;"
+INSERT_CLAIM_SQL = "INSERT INTO claims (Claim_ID, Food_ID, Receiver_ID, Status, Timestamp) VALUES (?, ?, ?, ?, ?);"
+UPDATE_CLAIM_SQL = "UPDATE claims SET Status=? WHERE Claim_ID=?;"
+DELETE_CLAIM_SQL = "DELETE FROM claims WHERE Claim_ID=?;"
+INSERT_PROVIDER_SQL = "INSERT INTO providers (Provider_ID, Name, Type, Address, City, Contact) VALUES (?, ?, ?, ?, ?, ?);"
+INSERT_RECEIVER_SQL = "INSERT INTO receivers (Receiver_ID, Name, Type, City, Contact) VALUES (?, ?, ?, ?, ?);"
+
+# Admin bulk upload: insert statement and the CSV columns it binds, in order
+BULK_INSERTS = {
+    "Listings": (INSERT_LISTING_SQL, ["Food_ID", "Food_Name", "Quantity", "Expiry_Date", "Provider_ID", "Provider_Type", "Location", "Food_Type", "Meal_Type"]),
+    "Claims": (INSERT_CLAIM_SQL, ["Claim_ID", "Food_ID", "Receiver_ID", "Status", "Timestamp"]),
+    "Providers": (INSERT_PROVIDER_SQL, ["Provider_ID", "Name", "Type", "Address", "City", "Contact"]),
+    "Receivers": (INSERT_RECEIVER_SQL, ["Receiver_ID", "Name", "Type", "City", "Contact"]),
+}
+# filter_domains keys fed by each insert, and the column holding the value
+FILTER_DOMAIN_COLUMNS = {
+    "Listings": {"city": "Location", "ftype": "Food_Type", "mtype": "Meal_Type"},
+    "Providers": {"city": "City", "ptype": "Type"},
+}
+ADD_FILTER_DOMAIN_SQL = "INSERT OR IGNORE INTO filter_domains (key, value) VALUES (?, ?);"
+# Stored formats, so uploaded dates are the same ISO text the ETL writes
+BULK_DATE_FORMATS = {"Expiry_Date": lambda v: v.date().isoformat(), "Timestamp": lambda v: v.isoformat(" ")}
+# INTEGER columns in the schema; coerced so CSV text never lands in them (blank -> NULL)
+BULK_INT_COLUMNS = ["Food_ID", "Provider_ID", "Receiver_ID", "Claim_ID", "Quantity"]
 
 st.set_page_config(page_title="Local Food Wastage Management System", layout="wide")
 
 # ---------- Helpers ----------
-def get_conn():
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False, detect_types=sqlite3.PARSE_DECLTYPES)
+@st.cache_resource
+def open_conn():
+    # One long-lived connection shared across reruns; autocommit, so each write is its own transaction.
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None, detect_types=sqlite3.PARSE_DECLTYPES)
     conn.execute("PRAGMA foreign_keys = ON;")
+    conn.execute("PRAGMA journal_mode = WAL;")
+    conn.execute("PRAGMA synchronous = NORMAL;")
+    conn.execute("PRAGMA temp_store = MEMORY;")
+    conn.execute("PRAGMA mmap_size = 268435456;")
+    # Remember which file we opened, so a DB replaced on disk is noticed
+    return conn, os.stat(DB_PATH).st_ino
+
+@st.cache_resource
+def get_db_lock():
+    # Every session thread shares the one connection; all use of it goes through this lock,
+    # so reset_conn() can never close it under a running query. Re-entrant for get_conn().
+    return threading.RLock()
+
+def get_conn():
+    # Callers hold get_db_lock()
+    conn, inode = open_conn()
+    if os.path.exists(DB_PATH) and os.stat(DB_PATH).st_ino != inode:
+        # foodwaste.db was replaced outside the app (e.g. `python etl_init_db.py`); reopen it
+        reset_conn()
+        clear_read_caches()
+        conn, inode = open_conn()
     return conn
 
+def reset_conn():
+    # Close the shared connection before the ETL replaces the DB file, so no stale WAL is left behind.
+    with get_db_lock():
+        if os.path.exists(DB_PATH):
+            open_conn()[0].close()
+        open_conn.clear()
+
 def df_read_sql(query, params=None):
-    with closing(get_conn()) as conn:
-        return pd.read_sql_query(query, conn, params=params)
+    with get_db_lock():
+        return pd.read_sql_query(query, get_conn(), params=params)
+
+def fetch_df(query, params=()):
+    # Plain cursor fetch for small COUNT/SUM/DISTINCT results; skips read_sql's dtype inference.
+    with get_db_lock():
+        cur = get_conn().execute(query, params)
+        return pd.DataFrame.from_records(cur.fetchall(), columns=[c[0] for c in cur.description])
+
+def downcast_ids(df):
+    # SQLite hands back 64-bit ints; the *_ID columns fit in far less
+    for col in df.columns:
+        if col.endswith("_ID") and pd.api.types.is_integer_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast="integer")
+    return df
+
+@st.cache_data(ttl="5m", max_entries=128)
+def cached_read_sql(query, params=()):
+    # Cached read for dashboard/filters/analytics; params is a tuple, or a dict for :name placeholders.
+    return downcast_ids(df_read_sql(query, params))
+
+@st.cache_data(ttl="5m", max_entries=128)
+def cached_fetch_df(query, params=()):
+    return fetch_df(query, params)
+
+@st.cache_data(ttl="1m")
+def load_analytics():
+    city_counts = fetch_df("SELECT Location AS City, COUNT(*) AS Listings FROM food_listings GROUP BY Location ORDER BY Listings DESC;")
+    status_df = fetch_df("SELECT Status, COUNT(*) AS Count FROM claims GROUP BY Status;")
+    try:
+        meal_claims = fetch_df("SELECT Meal_Type, Claim_Count FROM v_meal_claims ORDER BY Claim_Count DESC;")
+    except sqlite3.OperationalError:
+        # DBs built before the view existed
+        meal_claims = fetch_df("""
+            SELECT fl.Meal_Type, COUNT(*) AS Claim_Count
+            FROM claims c JOIN food_listings fl ON fl.Food_ID = c.Food_ID
+            GROUP BY fl.Meal_Type ORDER BY Claim_Count DESC;
+        """)
+    return city_counts, status_df, meal_claims
+
+def clear_read_caches():
+    # Call after any write so the next rerun sees fresh rows.
+    cached_read_sql.clear()
+    cached_fetch_df.clear()
+    load_analytics.clear()
+
+def after_write(message):
+    # Tab bodies are fragments, so rerun the whole app to refresh the KPIs, filters and tables
+    # drawn outside them; the message is shown as a toast once the rerun starts.
+    clear_read_caches()
+    st.session_state["write_message"] = message
+    st.rerun(scope="app")
 
 def run_query(query, params=None):
-    with closing(get_conn()) as conn:
-        cur = conn.cursor()
-        cur.execute(query, params or {})
+    with get_db_lock():
+        conn = get_conn()
+        cur = conn.execute(query, params or ())
         conn.commit()
-        return cur
+    return cur
+
+def run_many(query, seq_params):
+    # One transaction for the whole batch (one commit/fsync); rolled back if any row fails.
+    # The lock is held until it ends, so no read (or cache fill) can see the uncommitted rows.
+    with get_db_lock():
+        conn = get_conn()
+        conn.execute("BEGIN;")
+        with conn:
+            conn.executemany(query, seq_params)
+
+@st.cache_resource
+def load_queries(path, mtime):
+    # Parsed once per file version; mtime is only here to key the cache.
+    with open(path, "r", encoding="utf-8") as f:
+        raw = f.read()
+    # Very simple split: each SELECT/CTE block ends with semicolon
+    statements = [s.strip() for s in raw.split(";") if s.strip()]
+    # Skip non-SELECT DDL, keeping each statement's position for its label
+    return [(i, stmt) for i, stmt in enumerate(statements, start=1) if stmt.lower().startswith(("select","with"))]
+
+def paged_table(table, order_by, key):
+    # Only the current page is fetched and shipped to the browser; the PK tiebreak keeps pages stable.
+    total = int(cached_fetch_df(f"SELECT COUNT(*) AS n FROM {table};")["n"].iloc[0])
+    pages = max(1, -(-total // PAGE_SIZE))
+    page = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1, key=key)
+    st.caption(f"Page {page} of {pages} ({total} rows)")
+    df = cached_read_sql(f"SELECT * FROM {table} ORDER BY {order_by} LIMIT ? OFFSET ?;", (PAGE_SIZE, (int(page) - 1) * PAGE_SIZE))
+    st.dataframe(df, use_container_width=True)
+
+def add_filter_domains(pairs):
+    # Keep the sidebar dropdowns current after inserts; older DBs have no filter_domains table
+    try:
+        run_many(ADD_FILTER_DOMAIN_SQL, pairs)
+    except sqlite3.OperationalError:
+        pass
 
 def init_db_if_missing():
     if not os.path.exists(DB_PATH):
         st.warning("Database not found. Click **Build / Refresh DB** to create it from CSVs in ./data.")
     else:
+        # Cached reads never touch the connection, so check for a replaced file once per run
+        with get_db_lock():
+            get_conn()
         st.success(f"Connected to database at: {DB_PATH}")
 
 # ---------- Sidebar ----------
@@ -47,22 +194,43 @@ if st.sidebar.button("Build / Refresh DB"):
     etl = importlib.util.module_from_spec(spec)
     sys.modules["etl_init_db"] = etl
     spec.loader.exec_module(etl)
+    reset_conn()
     info = etl.build_database()
+    clear_read_caches()
     st.sidebar.success(f"DB built. Counts: {info['counts']}")
 
 init_db_if_missing()
+if "write_message" in st.session_state:
+    st.toast(st.session_state.pop("write_message"))
+
+# Dynamic filters (dropdown domains are materialized by the ETL into filter_domains)
+FILTER_DOMAINS_SQL = "SELECT key AS k, value AS v FROM filter_domains ORDER BY 1, 2;"
+# DBs built before filter_domains existed: derive the same rows from the base tables
+LEGACY_FILTER_DOMAINS_SQL = """
+    SELECT 'city' AS k, City AS v FROM providers WHERE City IS NOT NULL
+    UNION SELECT 'city', Location FROM food_listings WHERE Location IS NOT NULL
+    UNION SELECT 'ptype', Type FROM providers
+    UNION SELECT 'ftype', Food_Type FROM food_listings
+    UNION SELECT 'mtype', Meal_Type FROM food_listings
+    ORDER BY 1, 2;
+"""
+
+def load_filter_domains():
+    if not os.path.exists(DB_PATH):
+        return pd.DataFrame(columns=["k", "v"])
+    try:
+        return cached_fetch_df(FILTER_DOMAINS_SQL)
+    except sqlite3.OperationalError:
+        st.sidebar.info("This database predates the filter lookup table; rebuild it for faster filters.")
+        return cached_fetch_df(LEGACY_FILTER_DOMAINS_SQL)
 
-# Dynamic filters
-cities = df_read_sql("SELECT DISTINCT City FROM providers WHERE City IS NOT NULL UNION SELECT DISTINCT Location FROM food_listings WHERE Location IS NOT NULL ORDER BY 1;") if os.path.exists(DB_PATH) else pd.DataFrame(columns=["City"])
-provider_types = df_read_sql("SELECT DISTINCT Type FROM providers ORDER BY 1;") if os.path.exists(DB_PATH) else pd.DataFrame(columns=["Type"])
-food_types = df_read_sql("SELECT DISTINCT Food_Type FROM food_listings ORDER BY 1;") if os.path.exists(DB_PATH) else pd.DataFrame(columns=["Food_Type"])
-meal_types = df_read_sql("SELECT DISTINCT Meal_Type FROM food_listings ORDER BY 1;") if os.path.exists(DB_PATH) else pd.DataFrame(columns=["Meal_Type"])
+domains_df = load_filter_domains()
+domains = {k: v.tolist() for k, v in domains_df.dropna(subset=["v"]).groupby("k")["v"]}
 
-f_city = st.sidebar.multiselect("City", cities["City"].dropna().tolist())
-f_provider_type = st.sidebar.multiselect("Provider Type", provider_types["Type"].dropna().tolist())
-f_food_type = st.sidebar.multiselect("Food Type", food_types["Food_Type"].dropna().tolist())
-f_meal_type = st.sidebar.multiselect("Meal Type", meal_types["Meal_Type"].dropna().tolist())
-days_to_expiry = st.sidebar.slider("Expiring within (days)", min_value=1, max_value=30, value=7)
+f_city = st.sidebar.multiselect("City", domains.get("city", []))
+f_provider_type = st.sidebar.multiselect("Provider Type", domains.get("ptype", []))
+f_food_type = st.sidebar.multiselect("Food Type", domains.get("ftype", []))
+f_meal_type = st.sidebar.multiselect("Meal Type", domains.get("mtype", []))
 
 # ---------- Header ----------
 st.title("🥗 Local Food Wastage Management System")
@@ -71,12 +239,19 @@ st.caption("Connect surplus food providers with receivers, reduce waste, and ana
 # ---------- Dashboard ----------
 st.subheader("📊 Dashboard")
 
-if os.path.exists(DB_PATH):
-    # KPIs
-    kpi_total_providers = df_read_sql("SELECT COUNT(*) AS c FROM providers;")["c"].iloc[0]
-    kpi_total_receivers = df_read_sql("SELECT COUNT(*) AS c FROM receivers;")["c"].iloc[0]
-    kpi_total_listings = df_read_sql("SELECT COUNT(*) AS c FROM food_listings;")["c"].iloc[0]
-    kpi_total_qty = df_read_sql("SELECT SUM(COALESCE(Quantity,0)) AS qty FROM food_listings;")["qty"].iloc[0] or 0
+@st.fragment
+def kpis_fragment():
+    # KPIs (single row, one fetch)
+    kpis = cached_fetch_df("""
+        SELECT (SELECT COUNT(*) FROM providers) AS p,
+               (SELECT COUNT(*) FROM receivers) AS r,
+               (SELECT COUNT(*) FROM food_listings) AS l,
+               (SELECT COALESCE(SUM(Quantity),0) FROM food_listings) AS q;
+    """).iloc[0]
+    kpi_total_providers = kpis["p"]
+    kpi_total_receivers = kpis["r"]
+    kpi_total_listings = kpis["l"]
+    kpi_total_qty = kpis["q"] or 0
 
     col1, col2, col3, col4 = st.columns(4)
     col1.metric("Providers", kpi_total_providers)
@@ -84,36 +259,50 @@ if os.path.exists(DB_PATH):
     col3.metric("Listings", kpi_total_listings)
     col4.metric("Total Qty Available", int(kpi_total_qty))
 
-    # Filtered listings table
-    query = "SELECT * FROM food_listings WHERE 1=1"
-    params = {}
-    if f_city: query += " AND Location IN ({})".format(",".join("?"*len(f_city))); params.update({f"p{i}": v for i,v in enumerate(f_city)})
-    if f_provider_type: query += " AND Provider_Type IN ({})".format(",".join("?"*len(f_provider_type))); params.update({f"t{i}": v for i,v in enumerate(f_provider_type)})
-    if f_food_type: query += " AND Food_Type IN ({})".format(",".join("?"*len(f_food_type))); params.update({f"ft{i}": v for i,v in enumerate(f_food_type)})
-    if f_meal_type: query += " AND Meal_Type IN ({})".format(",".join("?"*len(f_meal_type))); params.update({f"mt{i}": v for i,v in enumerate(f_meal_type)})
-    # Workaround for dict->tuple ordering in pandas read_sql_query:
-    param_tuple = tuple(params.values()) if params else ()
-
-    listings_df = df_read_sql(query, param_tuple)
+@st.fragment
+def filtered_listings_fragment(filter_key):
+    # filter_key holds sorted tuples, so the same selection always maps to the same cache entry
+    if filter_key == ((), (), (), ()):
+        listings_df = cached_read_sql("SELECT * FROM food_listings;")
+    else:
+        f_city, f_provider_type, f_food_type, f_meal_type = filter_key
+        query = "SELECT * FROM food_listings WHERE 1=1"
+        params = {}
+        if f_city: query += " AND Location IN ({})".format(",".join(f":c{i}" for i in range(len(f_city)))); params.update({f"c{i}": v for i,v in enumerate(f_city)})
+        if f_provider_type: query += " AND Provider_Type IN ({})".format(",".join(f":t{i}" for i in range(len(f_provider_type)))); params.update({f"t{i}": v for i,v in enumerate(f_provider_type)})
+        if f_food_type: query += " AND Food_Type IN ({})".format(",".join(f":ft{i}" for i in range(len(f_food_type)))); params.update({f"ft{i}": v for i,v in enumerate(f_food_type)})
+        if f_meal_type: query += " AND Meal_Type IN ({})".format(",".join(f":mt{i}" for i in range(len(f_meal_type)))); params.update({f"mt{i}": v for i,v in enumerate(f_meal_type)})
+        listings_df = cached_read_sql(query, params)
     st.markdown("**Filtered Listings**")
     st.dataframe(listings_df, use_container_width=True)
 
-    # Expiring soon
-    expiring_df = df_read_sql(
-        "SELECT * FROM food_listings WHERE date(Expiry_Date) <= date('now', ?) ORDER BY Expiry_Date;",
-        (f"+{days_to_expiry} day",)
+@st.fragment
+def expiring_soon_fragment():
+    # The slider lives inside the fragment so moving it only reruns this block.
+    days_to_expiry = st.slider("Expiring within (days)", min_value=1, max_value=30, value=7)
+    # ISO dates compare correctly as text, so the cutoff is bound directly and the index is used
+    cutoff = (datetime.utcnow().date() + timedelta(days=days_to_expiry)).isoformat()
+    expiring_df = cached_read_sql(
+        "SELECT * FROM food_listings WHERE Expiry_Date <= ? ORDER BY Expiry_Date;",
+        (cutoff,)
     )
     st.markdown(f"**Expiring within {days_to_expiry} days**")
     st.dataframe(expiring_df, use_container_width=True)
 
+if os.path.exists(DB_PATH):
+    kpis_fragment()
+    filtered_listings_fragment(tuple(tuple(sorted(f)) for f in (f_city, f_provider_type, f_food_type, f_meal_type)))
+    expiring_soon_fragment()
+
 # ---------- Tabs for CRUD and Analytics ----------
 tabs = st.tabs(["Listings", "Claims", "Providers", "Receivers", "Analytics", "SQL Queries", "Admin"])
 
 # Listings Tab
-with tabs[0]:
+@st.fragment
+def listings_tab():
     st.header("🍽️ Listings")
     if os.path.exists(DB_PATH):
-        st.dataframe(df_read_sql("SELECT * FROM food_listings ORDER BY Expiry_Date;"), use_container_width=True)
+        paged_table("food_listings", "Expiry_Date, Food_ID", key="listings_page")
 
     with st.form("add_listing"):
         st.subheader("Add Listing")
@@ -133,11 +322,9 @@ with tabs[0]:
         submitted = st.form_submit_button("Create Listing")
         if submitted:
             try:
-                run_query("""
-                    INSERT INTO food_listings (Food_ID, Food_Name, Quantity, Expiry_Date, Provider_ID, Provider_Type, Location, Food_Type, Meal_Type)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
-                """, (int(Food_ID), Food_Name, int(Quantity), str(Expiry_Date), int(Provider_ID), Provider_Type, Location, Food_Type, Meal_Type))
-                st.success("Listing created.")
+                run_query(INSERT_LISTING_SQL, (int(Food_ID), Food_Name, int(Quantity), str(Expiry_Date), int(Provider_ID), Provider_Type, Location, Food_Type, Meal_Type))
+                add_filter_domains([("city", Location), ("ftype", Food_Type), ("mtype", Meal_Type)])
+                after_write("Listing created.")
             except Exception as e:
                 st.error(f"Error: {e}")
 
@@ -149,8 +336,8 @@ with tabs[0]:
         submitted_u = st.form_submit_button("Update")
         if submitted_u:
             try:
-                run_query("UPDATE food_listings SET Quantity=?, Expiry_Date=? WHERE Food_ID=?;", (int(Quantity_u), str(Expiry_Date_u), int(Food_ID_u)))
-                st.success("Listing updated.")
+                run_query(UPDATE_LISTING_SQL, (int(Quantity_u), str(Expiry_Date_u), int(Food_ID_u)))
+                after_write("Listing updated.")
             except Exception as e:
                 st.error(f"Error: {e}")
 
@@ -160,16 +347,20 @@ with tabs[0]:
         submitted_d = st.form_submit_button("Delete")
         if submitted_d:
             try:
-                run_query("DELETE FROM food_listings WHERE Food_ID=?;", (int(Food_ID_d),))
-                st.success("Listing deleted.")
+                run_query(DELETE_LISTING_SQL, (int(Food_ID_d),))
+                after_write("Listing deleted.")
             except Exception as e:
                 st.error(f"Error: {e}")
 
+with tabs[0]:
+    listings_tab()
+
 # Claims Tab
-with tabs[1]:
+@st.fragment
+def claims_tab():
     st.header("📬 Claims")
     if os.path.exists(DB_PATH):
-        st.dataframe(df_read_sql("SELECT * FROM claims ORDER BY Timestamp DESC;"), use_container_width=True)
+        paged_table("claims", "Timestamp DESC, Claim_ID", key="claims_page")
 
     with st.form("add_claim"):
         st.subheader("Add Claim")
@@ -183,11 +374,8 @@ with tabs[1]:
         submitted_c = st.form_submit_button("Create Claim")
         if submitted_c:
             try:
-                run_query("""
-                    INSERT INTO claims (Claim_ID, Food_ID, Receiver_ID, Status, Timestamp)
-                    VALUES (?, ?, ?, ?, ?);
-                """, (int(Claim_ID), int(Food_ID_c), int(Receiver_ID_c), Status_c, str(Timestamp_c)))
-                st.success("Claim created.")
+                run_query(INSERT_CLAIM_SQL, (int(Claim_ID), int(Food_ID_c), int(Receiver_ID_c), Status_c, str(Timestamp_c)))
+                after_write("Claim created.")
             except Exception as e:
                 st.error(f"Error: {e}")
 
@@ -198,8 +386,8 @@ with tabs[1]:
         submitted_uc = st.form_submit_button("Update Claim")
         if submitted_uc:
             try:
-                run_query("UPDATE claims SET Status=? WHERE Claim_ID=?;", (Status_u, int(Claim_ID_u)))
-                st.success("Claim updated.")
+                run_query(UPDATE_CLAIM_SQL, (Status_u, int(Claim_ID_u)))
+                after_write("Claim updated.")
             except Exception as e:
                 st.error(f"Error: {e}")
 
@@ -209,16 +397,20 @@ with tabs[1]:
         submitted_dc = st.form_submit_button("Delete")
         if submitted_dc:
             try:
-                run_query("DELETE FROM claims WHERE Claim_ID=?;", (int(Claim_ID_d),))
-                st.success("Claim deleted.")
+                run_query(DELETE_CLAIM_SQL, (int(Claim_ID_d),))
+                after_write("Claim deleted.")
             except Exception as e:
                 st.error(f"Error: {e}")
 
+with tabs[1]:
+    claims_tab()
+
 # Providers Tab
-with tabs[2]:
+@st.fragment
+def providers_tab():
     st.header("🏪 Providers")
     if os.path.exists(DB_PATH):
-        st.dataframe(df_read_sql("SELECT * FROM providers ORDER BY City, Name;"), use_container_width=True)
+        paged_table("providers", "City, Name, Provider_ID", key="providers_page")
 
     with st.form("add_provider"):
         st.subheader("Add Provider")
@@ -231,19 +423,21 @@ with tabs[2]:
         submitted_p = st.form_submit_button("Create Provider")
         if submitted_p:
             try:
-                run_query("""
-                    INSERT INTO providers (Provider_ID, Name, Type, Address, City, Contact)
-                    VALUES (?, ?, ?, ?, ?, ?);
-                """, (int(Provider_ID), Name, Type, Address, City, Contact))
-                st.success("Provider created.")
+                run_query(INSERT_PROVIDER_SQL, (int(Provider_ID), Name, Type, Address, City, Contact))
+                add_filter_domains([("city", City), ("ptype", Type)])
+                after_write("Provider created.")
             except Exception as e:
                 st.error(f"Error: {e}")
 
+with tabs[2]:
+    providers_tab()
+
 # Receivers Tab
-with tabs[3]:
+@st.fragment
+def receivers_tab():
     st.header("👤 Receivers")
     if os.path.exists(DB_PATH):
-        st.dataframe(df_read_sql("SELECT * FROM receivers ORDER BY City, Name;"), use_container_width=True)
+        paged_table("receivers", "City, Name, Receiver_ID", key="receivers_page")
 
     with st.form("add_receiver"):
         st.subheader("Add Receiver")
@@ -255,54 +449,46 @@ with tabs[3]:
         submitted_r = st.form_submit_button("Create Receiver")
         if submitted_r:
             try:
-                run_query("""
-                    INSERT INTO receivers (Receiver_ID, Name, Type, City, Contact)
-                    VALUES (?, ?, ?, ?, ?);
-                """, (int(Receiver_ID), Name_r, Type_r, City_r, Contact_r))
-                st.success("Receiver created.")
+                run_query(INSERT_RECEIVER_SQL, (int(Receiver_ID), Name_r, Type_r, City_r, Contact_r))
+                after_write("Receiver created.")
             except Exception as e:
                 st.error(f"Error: {e}")
 
+with tabs[3]:
+    receivers_tab()
+
 # Analytics Tab
-with tabs[4]:
+@st.fragment
+def analytics_tab():
     st.header("📈 Analytics")
     if os.path.exists(DB_PATH):
+        city_counts, status_df, meal_claims = load_analytics()
+
         # Top cities by listings
-        city_counts = df_read_sql("SELECT Location AS City, COUNT(*) AS Listings FROM food_listings GROUP BY Location ORDER BY Listings DESC;")
         st.bar_chart(city_counts.set_index("City"))
 
         # Claim status distribution
-        status_df = df_read_sql("SELECT Status, COUNT(*) AS Count FROM claims GROUP BY Status;")
         st.dataframe(status_df, use_container_width=True)
 
         # Meal type claims
-        meal_claims = df_read_sql("""
-            SELECT fl.Meal_Type, COUNT(*) AS Claim_Count
-            FROM claims c JOIN food_listings fl ON fl.Food_ID = c.Food_ID
-            GROUP BY fl.Meal_Type ORDER BY Claim_Count DESC;
-        """)
         st.bar_chart(meal_claims.set_index("Meal_Type"))
 
+with tabs[4]:
+    analytics_tab()
+
 # SQL Queries Tab
-with tabs[5]:
+@st.fragment
+def sql_queries_tab():
     st.header("🧠 Predefined SQL Insights")
     st.caption("These cover 15+ questions from the problem statement.")
     if os.path.exists(DB_PATH):
-        # Load and split queries by semicolon pairs considering comments
-        with open(QUERIES_PATH, "r", encoding="utf-8") as f:
-            raw = f.read()
-        # Very simple split: each SELECT/CTE block ends with semicolon
-        statements = [s.strip() for s in raw.split(";") if s.strip()]
-        for i, stmt in enumerate(statements, start=1):
-            # Skip non-SELECT DDL
-            if not stmt.lower().startswith(("select","with")):
-                continue
+        for i, stmt in load_queries(QUERIES_PATH, os.path.getmtime(QUERIES_PATH)):
             st.markdown(f"**Query {i}**")
             # Provide parameter defaults
             params = ()
             if ":city" in stmt:
                 # default to first chosen city or any city present
-                city_df = df_read_sql("SELECT City FROM providers WHERE City IS NOT NULL LIMIT 1;")
+                city_df = cached_fetch_df("SELECT City FROM providers WHERE City IS NOT NULL LIMIT 1;")
                 default_city = city_df["City"].iloc[0] if not city_df.empty else "Bengaluru"
                 stmt = stmt.replace(":city", "?")
                 params = (default_city,)
@@ -312,11 +498,14 @@ with tabs[5]:
                 params = (7,)
                 st.caption("Param days = 7")
             try:
-                df = df_read_sql(stmt, params)
+                df = cached_read_sql(stmt, params)
                 st.dataframe(df, use_container_width=True)
             except Exception as e:
                 st.error(f"Error running query: {e}\n\n{stmt}")
 
+with tabs[5]:
+    sql_queries_tab()
+
 # Admin Tab
 with tabs[6]:
     st.header("🛠️ Admin")
@@ -328,5 +517,31 @@ with tabs[6]:
         etl = importlib.util.module_from_spec(spec)
         sys.modules["etl_init_db"] = etl
         spec.loader.exec_module(etl)
+        reset_conn()
         info = etl.build_database()
-        st.success(f"Rebuilt. Counts: {info['counts']}")
+        after_write(f"Rebuilt. Counts: {info['counts']}")
+
+    st.subheader("Bulk Add from CSV")
+    bulk_kind = st.selectbox("Table", list(BULK_INSERTS))
+    bulk_sql, bulk_cols = BULK_INSERTS[bulk_kind]
+    st.caption("Columns: " + ", ".join(bulk_cols))
+    bulk_file = st.file_uploader("CSV file", type="csv")
+    if bulk_file is not None and st.button("Insert Rows"):
+        try:
+            # Text cells are kept verbatim ("" and "NA" included), as in the ETL
+            rows = pd.read_csv(bulk_file, usecols=bulk_cols, dtype=str, keep_default_na=False)[bulk_cols]
+            for col in BULK_INT_COLUMNS:
+                if col in rows.columns:
+                    rows[col] = pd.to_numeric(rows[col].replace("", pd.NA)).astype("Int64")
+            for col, fmt in BULK_DATE_FORMATS.items():
+                if col in rows.columns:
+                    rows[col] = pd.to_datetime(rows[col].replace("", pd.NA)).map(fmt, na_action="ignore")
+            params = rows.astype(object).where(rows.notna(), None)
+            run_many(bulk_sql, params.itertuples(index=False, name=None))
+            domain_cols = FILTER_DOMAIN_COLUMNS.get(bulk_kind, {})
+            add_filter_domains(sorted({(k, v) for k, col in domain_cols.items() for v in rows[col].dropna().astype(str)}))
+            after_write(f"Inserted {len(rows)} {bulk_kind.lower()}.")
+        except Exception as e:
+            # The batch may have committed before a later step failed
+            clear_read_caches()
+            st.error(f"Error: {e}")
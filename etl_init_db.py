@@ -1,8 +1,13 @@
 
 
+import hashlib
 import os
+import pickle
 import sqlite3
+import warnings
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
 from datetime import datetime, timedelta
 
 ROOT = os.path.dirname(__file__)
@@ -14,6 +19,7 @@ PROVIDERS_CSV = os.path.join(DATA_DIR, "providers_data.csv")
 RECEIVERS_CSV = os.path.join(DATA_DIR, "receivers_data.csv")
 LISTINGS_CSV  = os.path.join(DATA_DIR, "food_listings_data.csv")
 CLAIMS_CSV    = os.path.join(DATA_DIR, "claims_data.csv")
+CSV_CACHE     = os.path.join(DATA_DIR, ".csv_cache.pkl")
 
 def _ensure_dummy_data_if_missing():
     """Generate a tiny dummy dataset if CSVs aren't present, so the app can run end-to-end."""
@@ -44,11 +50,28 @@ def _ensure_dummy_data_if_missing():
             {"Claim_ID": 1003, "Food_ID": 102, "Receiver_ID": 2, "Status": "Cancelled", "Timestamp": str(now)},
         ]).to_csv(CLAIMS_CSV, index=False)
 
+# Explicit CSV schemas: no per-column type inference, and free-text columns stay text
+PROVIDERS_TYPES = {"Provider_ID": pa.int64(), "Name": pa.string(), "Type": pa.string(), "Address": pa.string(), "City": pa.string(), "Contact": pa.string()}
+RECEIVERS_TYPES = {"Receiver_ID": pa.int64(), "Name": pa.string(), "Type": pa.string(), "City": pa.string(), "Contact": pa.string()}
+LISTINGS_TYPES  = {"Food_ID": pa.int64(), "Food_Name": pa.string(), "Quantity": pa.int64(), "Expiry_Date": pa.string(), "Provider_ID": pa.int64(),
+                   "Provider_Type": pa.string(), "Location": pa.string(), "Food_Type": pa.string(), "Meal_Type": pa.string()}
+CLAIMS_TYPES    = {"Claim_ID": pa.int64(), "Food_ID": pa.int64(), "Receiver_ID": pa.int64(), "Status": pa.string(), "Timestamp": pa.string()}
+
+def _read_csv(path, column_types):
+    # Addresses contain quoted newlines; empty strings stay "" (as keep_default_na=False did) and
+    # missing integers come back as nullable Int64
+    tbl = pacsv.read_csv(
+        path,
+        parse_options=pacsv.ParseOptions(newlines_in_values=True),
+        convert_options=pacsv.ConvertOptions(column_types=column_types),
+    )
+    return tbl.to_pandas(types_mapper={pa.int64(): pd.Int64Dtype()}.get)
+
 def _read_csvs():
-    providers = pd.read_csv(PROVIDERS_CSV, dtype={"Provider_ID": "Int64"}, keep_default_na=False)
-    receivers = pd.read_csv(RECEIVERS_CSV, dtype={"Receiver_ID": "Int64"}, keep_default_na=False)
-    listings  = pd.read_csv(LISTINGS_CSV, dtype={"Food_ID": "Int64", "Provider_ID": "Int64"}, keep_default_na=False)
-    claims    = pd.read_csv(CLAIMS_CSV, dtype={"Claim_ID": "Int64", "Food_ID": "Int64", "Receiver_ID": "Int64"}, keep_default_na=False)
+    providers = _read_csv(PROVIDERS_CSV, PROVIDERS_TYPES)
+    receivers = _read_csv(RECEIVERS_CSV, RECEIVERS_TYPES)
+    listings  = _read_csv(LISTINGS_CSV, LISTINGS_TYPES)
+    claims    = _read_csv(CLAIMS_CSV, CLAIMS_TYPES)
 
     # Parse date columns
     if "Expiry_Date" in listings.columns:
@@ -62,73 +85,150 @@ def _read_csvs():
     listings  = listings.drop_duplicates(subset=["Food_ID"]).dropna(subset=["Food_ID"])
     claims    = claims.drop_duplicates(subset=["Claim_ID"]).dropna(subset=["Claim_ID"])
 
-    # Enforce integer types after dropping NA
-    providers["Provider_ID"] = providers["Provider_ID"].astype(int)
-    receivers["Receiver_ID"] = receivers["Receiver_ID"].astype(int)
-    listings["Food_ID"] = listings["Food_ID"].astype(int)
-    listings["Provider_ID"] = listings["Provider_ID"].astype(int)
-    claims["Claim_ID"] = claims["Claim_ID"].astype(int)
-    claims["Food_ID"] = claims["Food_ID"].astype(int)
-    claims["Receiver_ID"] = claims["Receiver_ID"].astype(int)
-
-    # Referential integrity: keep only valid links
-    valid_provider_ids = set(providers["Provider_ID"])
-    listings = listings[listings["Provider_ID"].isin(valid_provider_ids)].copy()
+    # Enforce integer types after dropping NA (int64, as SQLite stores them; app.py downcasts on read)
+    providers["Provider_ID"] = providers["Provider_ID"].astype("int64")
+    receivers["Receiver_ID"] = receivers["Receiver_ID"].astype("int64")
+    listings["Food_ID"] = listings["Food_ID"].astype("int64")
+    listings["Provider_ID"] = listings["Provider_ID"].astype("int64")
+    claims["Claim_ID"] = claims["Claim_ID"].astype("int64")
+    claims["Food_ID"] = claims["Food_ID"].astype("int64")
+    claims["Receiver_ID"] = claims["Receiver_ID"].astype("int64")
 
-    valid_food_ids = set(listings["Food_ID"])
-    valid_receiver_ids = set(receivers["Receiver_ID"])
-    claims = claims[claims["Food_ID"].isin(valid_food_ids) & claims["Receiver_ID"].isin(valid_receiver_ids)].copy()
+    # Referential integrity: keep only valid links (semi-joins; parent keys are unique after dedup)
+    listings = listings.merge(providers[["Provider_ID"]], on="Provider_ID", how="inner")
+    claims = (claims.merge(listings[["Food_ID"]], on="Food_ID", how="inner")
+                    .merge(receivers[["Receiver_ID"]], on="Receiver_ID", how="inner"))
 
     # Sanitise categorical values to match schema checks
-    def normalize(value, allowed, default):
-        v = str(value).strip()
-        return v if v in allowed else default
+    def normalize(col, allowed, default):
+        s = col.astype(str).str.strip()
+        return pd.Categorical(s.where(s.isin(allowed), default), categories=allowed)
 
     if "Type" in providers.columns:
-        providers["Type"] = providers["Type"].map(lambda v: normalize(v, {'Restaurant','Grocery Store','Supermarket','Bakery','Caterer','Other'}, 'Other'))
+        providers["Type"] = normalize(providers["Type"], ['Restaurant','Grocery Store','Supermarket','Bakery','Caterer','Other'], 'Other')
     if "Type" in receivers.columns:
-        receivers["Type"] = receivers["Type"].map(lambda v: normalize(v, {'NGO','Community Center','Individual','Shelter','Other'}, 'Other'))
+        receivers["Type"] = normalize(receivers["Type"], ['NGO','Community Center','Individual','Shelter','Other'], 'Other')
     if "Food_Type" in listings.columns:
-        listings["Food_Type"] = listings["Food_Type"].map(lambda v: normalize(v, {'Vegetarian','Non-Vegetarian','Vegan','Other'}, 'Other'))
+        listings["Food_Type"] = normalize(listings["Food_Type"], ['Vegetarian','Non-Vegetarian','Vegan','Other'], 'Other')
     if "Meal_Type" in listings.columns:
-        listings["Meal_Type"] = listings["Meal_Type"].map(lambda v: normalize(v, {'Breakfast','Lunch','Dinner','Snacks','Other'}, 'Other'))
+        listings["Meal_Type"] = normalize(listings["Meal_Type"], ['Breakfast','Lunch','Dinner','Snacks','Other'], 'Other')
     if "Status" in claims.columns:
-        claims["Status"] = claims["Status"].map(lambda v: normalize(v, {'Pending','Completed','Cancelled'}, 'Pending'))
+        claims["Status"] = normalize(claims["Status"], ['Pending','Completed','Cancelled'], 'Pending')
+
+    # Provider_Type is free text but takes only a handful of values; this shrinks the frames
+    # kept in the CSV cache (the SQLite rows are written as plain text either way).
+    # City/Location are nearly unique per row, so category would not save anything there.
+    if "Provider_Type" in listings.columns:
+        listings["Provider_Type"] = listings["Provider_Type"].astype("category")
 
     return providers, receivers, listings, claims
 
-def _run_schema(conn):
+def _schema_statements():
     with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
         sql = f.read()
-    conn.executescript(sql)
+    return [s.strip() for s in sql.split(";") if s.strip()]
+
+def _read_csvs_cached():
+    """Return _read_csvs() output, reusing the pickled frames from the last run while the CSVs and this module are unchanged."""
+    # Hashing this file's source invalidates the cache whenever the parsing/normalization code changes
+    with open(__file__, "rb") as f:
+        source_hash = hashlib.sha256(f.read()).hexdigest()
+    key = (source_hash, tuple(os.path.getmtime(p) for p in (PROVIDERS_CSV, RECEIVERS_CSV, LISTINGS_CSV, CLAIMS_CSV)))
+    if os.path.exists(CSV_CACHE):
+        try:
+            cached_key, frames = pd.read_pickle(CSV_CACHE)
+            if cached_key == key:
+                return frames
+        except (pickle.UnpicklingError, EOFError, ValueError, AttributeError, ImportError) as e:
+            warnings.warn(f"Ignoring unreadable CSV cache {CSV_CACHE}: {e!r}")
+    frames = _read_csvs()
+    pd.to_pickle((key, frames), CSV_CACHE)
+    return frames
+
+def _run_schema(conn):
+    # Tables only; indexes are built after the bulk load by _create_indexes
+    stmts = [s for s in _schema_statements() if not s.upper().startswith("CREATE INDEX")]
+    conn.executescript(";\n".join(stmts) + ";")
+
+def _create_indexes(conn):
+    for stmt in _schema_statements():
+        if stmt.upper().startswith("CREATE INDEX"):
+            conn.execute(stmt)
+
+FILTER_DOMAINS_SQL = """
+    INSERT OR IGNORE INTO filter_domains (key, value)
+    SELECT 'city', City FROM providers WHERE City IS NOT NULL
+    UNION SELECT 'city', Location FROM food_listings WHERE Location IS NOT NULL
+    UNION SELECT 'ptype', Type FROM providers WHERE Type IS NOT NULL
+    UNION SELECT 'ftype', Food_Type FROM food_listings WHERE Food_Type IS NOT NULL
+    UNION SELECT 'mtype', Meal_Type FROM food_listings WHERE Meal_Type IS NOT NULL;
+"""
+
+def _build_filter_domains(conn):
+    # One scan at load time so the app never runs DISTINCT over the big tables
+    conn.execute("DELETE FROM filter_domains;")
+    conn.execute(FILTER_DOMAINS_SQL)
+
+def _bulk_insert(conn, table, df):
+    cols = ",".join(df.columns)
+    ph = ",".join("?" * len(df.columns))
+    # sqlite3 cannot bind pd.Timestamp; write the same ISO text to_sql did
+    df = df.copy()
+    for col in df.select_dtypes(include=["datetime", "datetimetz"]).columns:
+        df[col] = df[col].map(lambda v: v.isoformat(" "), na_action="ignore")
+    # Plain Python values; NaN/NaT become NULL as with to_sql
+    rows = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+    conn.executemany(f"INSERT INTO {table}({cols}) VALUES({ph})", rows)
 
 def build_database():
     _ensure_dummy_data_if_missing()
 
-    providers, receivers, listings, claims = _read_csvs()
+    providers, receivers, listings, claims = _read_csvs_cached()
 
-    if os.path.exists(DB_PATH):
-        os.remove(DB_PATH)
+    # Build next to the live DB and swap it in only once the load has succeeded,
+    # so a failed rebuild leaves the previous database untouched
+    tmp_path = DB_PATH + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
 
-    conn = sqlite3.connect(DB_PATH, detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES)
+    conn = sqlite3.connect(tmp_path, detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES)
     try:
-        conn.execute("PRAGMA foreign_keys = ON;")
+        # Bulk-load settings; they only last for this connection
+        conn.execute("PRAGMA synchronous = OFF;")
+        conn.execute("PRAGMA journal_mode = MEMORY;")
         _run_schema(conn)
-
-        # Load data
-        providers.to_sql("providers", conn, if_exists="append", index=False)
-        receivers.to_sql("receivers", conn, if_exists="append", index=False)
-        listings.to_sql("food_listings", conn, if_exists="append", index=False)
-        claims.to_sql("claims", conn, if_exists="append", index=False)
+        # schema.sql turns foreign keys on; _read_csvs already dropped orphan rows, so skip per-row checks
+        conn.execute("PRAGMA foreign_keys = OFF;")
+
+        # Load data in a single transaction, then index the loaded tables
+        conn.execute("BEGIN;")
+        _bulk_insert(conn, "providers", providers)
+        _bulk_insert(conn, "receivers", receivers)
+        _bulk_insert(conn, "food_listings", listings)
+        _bulk_insert(conn, "claims", claims)
+        _create_indexes(conn)
+        _build_filter_domains(conn)
+        conn.commit()
+        # Planner statistics for the new indexes
+        conn.execute("ANALYZE;")
 
         # Quick counts
         cur = conn.cursor()
         tables = ["providers","receivers","food_listings","claims"]
         counts = {t: cur.execute(f"SELECT COUNT(*) FROM {t};").fetchone()[0] for t in tables}
-        return {"db_path": DB_PATH, "counts": counts}
-    finally:
-        conn.commit()
+    except Exception:
+        conn.rollback()
         conn.close()
+        os.remove(tmp_path)
+        raise
+    conn.close()
+
+    # WAL/shm files from the old DB would be replayed into the new one
+    for suffix in ("-wal", "-shm"):
+        if os.path.exists(DB_PATH + suffix):
+            os.remove(DB_PATH + suffix)
+    os.replace(tmp_path, DB_PATH)
+    return {"db_path": DB_PATH, "counts": counts}
 
 if __name__ == "__main__":
     info = build_database()
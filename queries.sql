@@ -93,7 +93,7 @@ ORDER BY Total_Donated_Quantity DESC;
 
 -- 14. Listings expiring within the next N days (param: :days)
 SELECT * FROM food_listings
-WHERE DATE(Expiry_Date) <= DATE('now', '+' || :days || ' day')
+WHERE Expiry_Date <= DATE('now', '+' || :days || ' day')
 ORDER BY Expiry_Date;
 
 -- 15. Claim conversion rate by provider (Completed claims / total listings linked to provider)
@@ -40,7 +40,21 @@ CREATE TABLE IF NOT EXISTS claims (
   FOREIGN KEY (Receiver_ID) REFERENCES receivers(Receiver_ID) ON DELETE CASCADE
 );
 
-CREATE INDEX IF NOT EXISTS idx_food_listings_city ON food_listings(Location);
+-- Dropdown domains for the app's sidebar filters, materialized by the ETL
+CREATE TABLE IF NOT EXISTS filter_domains (
+  key TEXT NOT NULL,
+  value TEXT NOT NULL,
+  PRIMARY KEY (key, value)
+) WITHOUT ROWID;
+
+CREATE VIEW IF NOT EXISTS v_meal_claims AS
+SELECT fl.Meal_Type, COUNT(*) AS Claim_Count
+FROM claims c JOIN food_listings fl ON fl.Food_ID = c.Food_ID
+GROUP BY fl.Meal_Type;
+
+CREATE INDEX IF NOT EXISTS idx_food_listings_filters ON food_listings(Location, Food_Type, Meal_Type, Provider_Type);
+CREATE INDEX IF NOT EXISTS idx_food_listings_expiry ON food_listings(Expiry_Date);
 CREATE INDEX IF NOT EXISTS idx_food_listings_provider ON food_listings(Provider_ID);
 CREATE INDEX IF NOT EXISTS idx_claims_food ON claims(Food_ID);
 CREATE INDEX IF NOT EXISTS idx_claims_receiver ON claims(Receiver_ID);
+CREATE INDEX IF NOT EXISTS idx_providers_city ON providers(City);